@@ -12,3 +12,9 @@ TAGS_DIR = 'tags'
 
 HASH_LENGTH = hash_length()
 HASH_CHARSET = '0123456789abcdef'
+
+MAX_REF_DEPTH = 16
+
+OBJECT_CACHE_SIZE = 1024
+STAT_CACHE_SIZE = 65536
+MTIME_GRANULARITY_NS = 2_000_000_000
@@ -1,12 +1,133 @@
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Tuple
 from .plumbing import hash_file, hash_object
 from . import Tree, TreeRecord, TreeRecordType
+from .constants import MTIME_GRANULARITY_NS, STAT_CACHE_SIZE
+
+# (mtime_ns, ctime_ns, size, inode, device) of a file
+StatKey = tuple[int, int, int, int, int]
+
+
+class StatCache:
+    """Content hashes of files keyed by path, reused while the file's stat data is unchanged.
+
+    Entries are kept in least recently used order and bounded by a maximum size. They are also indexed by
+    parent directory, so forgetting the deleted files of a scanned directory only touches that directory's
+    entries instead of the whole cache."""
+
+    def __init__(self, max_size: int = STAT_CACHE_SIZE) -> None:
+        """Create an empty cache.
+
+        :param max_size: The number of entries after which the least recently used ones are evicted."""
+        self._entries: OrderedDict[str, tuple[StatKey, str]] = OrderedDict()
+        # Directory -> cached file paths directly inside it
+        self._dir_files: dict[str, set[str]] = {}
+        # Directory -> subdirectories that have cached files somewhere below them
+        self._subdirs: dict[str, set[str]] = {}
+        self._max_size = max_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._entries
+
+    def get(self, path: str) -> tuple[StatKey, str] | None:
+        """Look up the cached entry of a file, marking it as recently used.
+
+        :param path: The path of the file.
+        :return: The stat key and content hash cached for the file, or None if it is not cached."""
+        entry = self._entries.get(path)
+        if entry is not None:
+            self._entries.move_to_end(path)
+        return entry
+
+    def put(self, path: str, key: StatKey, file_hash: str) -> None:
+        """Cache the content hash of a file, evicting the least recently used entries if the cache is full.
+
+        :param path: The path of the file.
+        :param key: The stat key of the file when it was hashed.
+        :param file_hash: The content hash of the file."""
+        self._entries[path] = (key, file_hash)
+        self._entries.move_to_end(path)
+
+        dir_path = os.path.dirname(path)
+        files = self._dir_files.get(dir_path)
+        if files is None:
+            files = self._dir_files[dir_path] = set()
+            self._link_dir(dir_path)
+        files.add(path)
+
+        while len(self._entries) > self._max_size:
+            self.discard(next(iter(self._entries)))
+
+    def discard(self, path: str) -> None:
+        """Remove the entry of a file, if there is one.
+
+        :param path: The path of the file."""
+        if self._entries.pop(path, None) is None:
+            return
+
+        dir_path = os.path.dirname(path)
+        files = self._dir_files[dir_path]
+        files.discard(path)
+        if not files:
+            del self._dir_files[dir_path]
+            self._unlink_dir(dir_path)
+
+    def prune(self, scanned_dirs: set[str], scanned_files: set[str]) -> None:
+        """Forget the files in scanned directories that the scan did not find.
+
+        :param scanned_dirs: Every directory listed by the scan.
+        :param scanned_files: Every file found by the scan."""
+        for dir_path in scanned_dirs:
+            for path in self._dir_files.get(dir_path, set()) - scanned_files:
+                self.discard(path)
+
+            # A cached subdirectory that was not listed has been deleted, with everything below it
+            for subdir in self._subdirs.get(dir_path, set()) - scanned_dirs:
+                self._discard_tree(subdir)
+
+    def _discard_tree(self, dir_path: str) -> None:
+        for subdir in list(self._subdirs.get(dir_path, ())):
+            self._discard_tree(subdir)
+        for path in list(self._dir_files.get(dir_path, ())):
+            self.discard(path)
+
+    def _link_dir(self, dir_path: str) -> None:
+        # Register the directory under each of its ancestors, up to the first one already registered
+        parent = os.path.dirname(dir_path)
+        while parent != dir_path:
+            subdirs = self._subdirs.setdefault(parent, set())
+            if dir_path in subdirs:
+                return
+            subdirs.add(dir_path)
+            dir_path, parent = parent, os.path.dirname(parent)
+
+    def _unlink_dir(self, dir_path: str) -> None:
+        # Remove directories that no longer have cached files below them from their ancestors
+        parent = os.path.dirname(dir_path)
+        while parent != dir_path and dir_path not in self._dir_files and dir_path not in self._subdirs:
+            subdirs = self._subdirs[parent]
+            subdirs.discard(dir_path)
+            if subdirs:
+                return
+            del self._subdirs[parent]
+            dir_path, parent = parent, os.path.dirname(parent)
+
 
 class MissingHashError(Exception):
     """Custom exception raised when a required hash is missing."""
 
-def build_fsTree(path: Path, tree_hashes: dict[str, Tree], repo_dir_name: str) -> Tuple[Tree, str]:
+def _entry_name(entry: os.DirEntry) -> str:
+    return entry.name
+
+def build_fsTree(path: Path, tree_hashes: dict[str, Tree], repo_dir_name: str,
+                 stat_cache: StatCache | None = None) -> Tuple[Tree, str]:
         """
         Builds a Tree structure from the filesystem in memory.
         Populates 'tree_hashes' with hash -> Tree mappings.
@@ -15,46 +136,92 @@ def build_fsTree(path: Path, tree_hashes: dict[str, Tree], repo_dir_name: str) -
         :param path: The directory path to build the tree from.
         :param tree_hashes: A dictionary to populate with tree hashes and their corresponding Tree objects.
         :param repo_dir_name: The name of the repository directory to ignore.
+        :param stat_cache: Optional cache of file hashes by path, used to skip hashing files whose
+            stat data has not changed. It is updated with the files hashed by this call, and entries for
+            files under `path` that no longer exist are dropped.
         :return: A tuple of (root_tree, root_tree_hash).
         """
         if not path.is_dir():
             raise NotADirectoryError(f"{path} is not a directory")
 
-        traversal_stack = [path]
+        root_path = os.fspath(path)
+        traversal_stack = [root_path]
         
         # Stores directories in the order we found them 
         # We will iterate this in reverse order to build trees from the bottom up
         build_order = []
+        file_paths: list[str] = []
+
+        # Each directory is listed once; the sorted listing is kept for the build pass.
+        # os.scandir yields the entry type from the directory listing itself,
+        # so is_dir() does not need an extra stat per entry
+        listings: dict[str, list[os.DirEntry]] = {}
 
         while traversal_stack:
             current_path = traversal_stack.pop()
             build_order.append(current_path)
 
-            for entry in sorted(current_path.iterdir(), reverse=True):
-                if entry.name == repo_dir_name:
-                    continue
+            with os.scandir(current_path) as entries:
+                listing = sorted((entry for entry in entries if entry.name != repo_dir_name), key=_entry_name)
+            listings[current_path] = listing
+
+            for entry in reversed(listing):
                 if entry.is_dir():
-                    traversal_stack.append(entry)
+                    traversal_stack.append(entry.path)
+                else:
+                    file_paths.append(entry.path)
+
+        file_hashes: dict[str, str] = {}
+        to_hash = file_paths
+        file_stats: dict[str, StatKey] = {}
+
+        # hash_file and os.stat both release the GIL while they wait on the filesystem,
+        # so the per-file work below runs concurrently instead of one file after the other
+        with ThreadPoolExecutor() as executor:
+            if stat_cache is not None:
+                scan_start = time.time_ns()
+                to_hash = []
+
+                for file_path, st in zip(file_paths, executor.map(os.stat, file_paths), strict=True):
+                    key = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino, st.st_dev)
+                    cached = stat_cache.get(file_path)
+
+                    if cached is not None and cached[0] == key:
+                        file_hashes[file_path] = cached[1]
+                    else:
+                        # The cached hash is outdated; it is replaced below only if the new one can be trusted
+                        stat_cache.discard(file_path)
+                        to_hash.append(file_path)
+                        file_stats[file_path] = key
 
-        dir_hashes: dict[Path, str] = {}
+            # Hash every file whose hash could not be reused
+            file_hashes.update(zip(to_hash, executor.map(hash_file, to_hash), strict=True))
+
+        if stat_cache is not None:
+            # A file changed within the same timestamp tick as this scan could keep its stat data,
+            # so only remember hashes for files whose last change is safely older than the scan
+            for file_path, key in file_stats.items():
+                if max(key[0], key[1]) < scan_start - MTIME_GRANULARITY_NS:
+                    stat_cache.put(file_path, key, file_hashes[file_path])
+
+            # Forget files under this directory that were deleted since they were cached
+            stat_cache.prune(set(build_order), set(file_paths))
+
+        dir_hashes: dict[str, str] = {}
 
         while build_order:
             current_path = build_order.pop()
             tree_records: dict[str, TreeRecord] = {}
 
-            for entry in sorted(current_path.iterdir()):
-                if entry.name == repo_dir_name:
-                    continue
-
+            for entry in listings.pop(current_path):
                 if entry.is_dir():
-                    if entry not in dir_hashes:
-                         raise MissingHashError(f"Missing hash for subdirectory {entry}")
+                    if entry.path not in dir_hashes:
+                         raise MissingHashError(f"Missing hash for subdirectory {entry.path}")
                     
-                    subtree_hash = dir_hashes[entry]
+                    subtree_hash = dir_hashes[entry.path]
                     record = TreeRecord(TreeRecordType.TREE, subtree_hash, entry.name)
                 else:
-                    file_hash = hash_file(str(entry))
-                    record = TreeRecord(TreeRecordType.BLOB, file_hash, entry.name)
+                    record = TreeRecord(TreeRecordType.BLOB, file_hashes[entry.path], entry.name)
                 
                 tree_records[entry.name] = record
 
@@ -64,4 +231,4 @@ def build_fsTree(path: Path, tree_hashes: dict[str, Tree], repo_dir_name: str) -
             
             dir_hashes[current_path] = t_hash
 
-        return tree_hashes[dir_hashes[path]], dir_hashes[path]
\ No newline at end of file
+        return tree_hashes[dir_hashes[root_path]], dir_hashes[root_path]
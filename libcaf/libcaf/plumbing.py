@@ -68,11 +68,11 @@ def load_commit(root_dir: str | Path, commit_ref: HashRef) -> Commit:
     return _libcaf.load_commit(root_dir, commit_ref)
 
 
-def save_tree(root_dir: str | Path, tree: Tree) -> None:
+def save_tree(root_dir: str | Path, tree: Tree) -> HashRef:
     if isinstance(root_dir, Path):
         root_dir = str(root_dir)
 
-    _libcaf.save_tree(root_dir, tree)
+    return HashRef(_libcaf.save_tree(root_dir, tree))
 
 
 def load_tree(root_dir: str | Path, hash_value: str) -> Tree:
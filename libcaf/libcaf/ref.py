@@ -27,6 +27,17 @@ class SymRef(str):
 
 Ref = HashRef | SymRef | str
 
+# Deletes every hash character, so a well-formed hash translates to the empty string
+_STRIP_HASH_CHARSET = str.maketrans('', '', HASH_CHARSET)
+
+
+def is_hash(value: str) -> bool:
+    """Check whether a string is a well-formed object hash.
+
+    :param value: The string to check
+    :return: True if the string has the hash length and only hash characters, False otherwise"""
+    return len(value) == HASH_LENGTH and not value.translate(_STRIP_HASH_CHARSET)
+
 
 def read_ref(ref_file: Path) -> Ref | None:
     """Read a reference from a file.
@@ -43,20 +54,22 @@ def read_ref(ref_file: Path) -> Ref | None:
         if not content:
             return None
 
-        if len(content) == HASH_LENGTH and all(c in HASH_CHARSET for c in content):
+        if is_hash(content):
             return HashRef(content)
 
         msg = f'Invalid reference format in ref file {ref_file}!'
         raise RefError(msg)
 
 
-def write_ref(ref_file: Path, ref: Ref) -> None:
+def write_ref(ref_file: Path, ref: Ref, *, exclusive: bool = False) -> None:
     """Write a reference to a file.
 
     :param ref_file: Path to the reference file
     :param ref: Reference to write (HashRef or SymRef)
-    :raises RefError: If the reference type is invalid"""
-    with ref_file.open('w') as f:
+    :param exclusive: If True, fail instead of overwriting an existing reference file
+    :raises RefError: If the reference type is invalid
+    :raises FileExistsError: If exclusive is True and the reference file already exists"""
+    with ref_file.open('x' if exclusive else 'w') as f:
         match ref:
             case HashRef():
                 f.write(ref)
@@ -1,22 +1,24 @@
 """libcaf repository management."""
 
+import os
 import shutil
-from collections import deque
-from collections.abc import Callable, Generator, Sequence
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Generator, Iterable, Sequence
 from dataclasses import dataclass
 from datetime import datetime
 from functools import wraps
 from pathlib import Path
 from typing import Concatenate, Tuple
 from . import Blob, Commit, Tree, TreeRecord, TreeRecordType, Tag
-from .constants import (DEFAULT_BRANCH, DEFAULT_REPO_DIR, HASH_CHARSET, HASH_LENGTH, HEADS_DIR, HEAD_FILE,
-                        OBJECTS_SUBDIR, REFS_DIR, TAGS_DIR)
+from .constants import (DEFAULT_BRANCH, DEFAULT_REPO_DIR, HEADS_DIR, HEAD_FILE,
+                        MAX_REF_DEPTH, MTIME_GRANULARITY_NS, OBJECT_CACHE_SIZE, OBJECTS_SUBDIR, REFS_DIR, TAGS_DIR)
 from .plumbing import hash_object, hash_file, load_commit, load_tree, save_commit, save_file_content, save_tree, save_tag, load_tag
-from .ref import HashRef, Ref, RefError, SymRef, read_ref, write_ref
+from .ref import HashRef, Ref, RefError, SymRef, is_hash, read_ref, write_ref
 from .exceptions import TagNotFound, TagExistsError, TagError, UnknownHashError, RepositoryError, RepositoryNotFoundError
-from .internal import build_fsTree, MissingHashError
+from .internal import build_fsTree, MissingHashError, StatCache
 
-@dataclass
+@dataclass(slots=True)
 class Diff:
     """A class representing a difference between two tree records."""
 
@@ -25,36 +27,36 @@ class Diff:
     children: list['Diff']
 
 
-@dataclass
+@dataclass(slots=True)
 class AddedDiff(Diff):
     """An added tree record diff as part of a commit."""
 
 
-@dataclass
+@dataclass(slots=True)
 class RemovedDiff(Diff):
     """A removed tree record diff as part of a commit."""
 
 
-@dataclass
+@dataclass(slots=True)
 class ModifiedDiff(Diff):
     """A modified tree record diff as part of a commit."""
 
 
-@dataclass
+@dataclass(slots=True)
 class MovedToDiff(Diff):
     """A tree record diff that has been moved elsewhere as part of a commit."""
 
     moved_to: 'MovedFromDiff | None'
 
 
-@dataclass
+@dataclass(slots=True)
 class MovedFromDiff(Diff):
     """A tree record diff that has been moved from elsewhere as part of a commit."""
 
     moved_from: MovedToDiff | None
 
 
-@dataclass
+@dataclass(slots=True)
 class LogEntry:
     """A class representing a log entry for a branch or commit history."""
 
@@ -80,6 +82,37 @@ class Repository:
         else:
             self.repo_dir = Path(repo_dir)
 
+        # The repository layout is fixed once the working and repo dirs are known,
+        # so build these paths once instead of on every accessor call
+        self._repo_path = self.working_dir / self.repo_dir
+        self._objects_dir = self._repo_path / OBJECTS_SUBDIR
+        self._refs_dir = self._repo_path / REFS_DIR
+        self._heads_dir = self._refs_dir / HEADS_DIR
+        self._tags_dir = self._refs_dir / TAGS_DIR
+        self._head_file = self._repo_path / HEAD_FILE
+
+        # String forms for the existence checks that run on every call, which can go
+        # straight to os.path without building a Path first
+        self._repo_path_str = str(self._repo_path)
+        self._heads_dir_str = str(self._heads_dir)
+        self._tags_dir_str = str(self._tags_dir)
+
+        # Trees, commits and tags are content-addressed and never change once written,
+        # so loaded objects can be kept around for the lifetime of the instance
+        self._tree_cache: OrderedDict[str, Tree] = OrderedDict()
+        self._commit_cache: OrderedDict[str, Commit] = OrderedDict()
+        self._tag_cache: OrderedDict[str, Tag] = OrderedDict()
+
+        # Hashes of working files keyed by path, reused while their stat data is unchanged
+        self._stat_cache = StatCache()
+        # Parsed ref files keyed by path, reused the same way
+        self._ref_cache: dict[str, tuple[tuple[int, int, int, int, int], Ref | None]] = {}
+
+        # Names of all refs, rebuilt when a ref directory changes on disk or when
+        # this instance adds or removes a ref itself
+        self._ref_index: frozenset[str] | None = None
+        self._ref_index_stamp: dict[str, int] | None = None
+
     def init(self, default_branch: str = DEFAULT_BRANCH) -> None:
         """Initialize a new CAF repository in the working directory.
 
@@ -102,37 +135,37 @@ class Repository:
         """Check if the repository exists in the working directory.
 
         :return: True if the repository exists, False otherwise."""
-        return self.repo_path().exists()
+        return os.path.exists(self._repo_path_str)
 
     def repo_path(self) -> Path:
         """Get the path to the repository directory.
 
         :return: The path to the repository directory."""
-        return self.working_dir / self.repo_dir
+        return self._repo_path
 
     def objects_dir(self) -> Path:
         """Get the path to the objects directory within the repository.
 
         :return: The path to the objects directory."""
-        return self.repo_path() / OBJECTS_SUBDIR
+        return self._objects_dir
 
     def refs_dir(self) -> Path:
         """Get the path to the refs directory within the repository.
 
         :return: The path to the refs directory."""
-        return self.repo_path() / REFS_DIR
+        return self._refs_dir
 
     def heads_dir(self) -> Path:
         """Get the path to the heads directory within the repository.
 
         :return: The path to the heads directory."""
-        return self.refs_dir() / HEADS_DIR
+        return self._heads_dir
     
     def tags_dir(self) -> Path:
         """Get the path to the tags directory within the repository.
 
         :return: The path to the tags directory."""
-        return self.refs_dir() / TAGS_DIR
+        return self._tags_dir
 
     @staticmethod
     def requires_repo[**P, R](func: Callable[Concatenate['Repository', P], R]) -> \
@@ -164,7 +197,7 @@ class Repository:
             msg = 'HEAD ref file does not exist'
             raise RepositoryError(msg)
 
-        return read_ref(head_file)
+        return self._read_ref_file(head_file)
 
     @requires_repo
     def head_commit(self) -> HashRef | None:
@@ -191,10 +224,67 @@ class Repository:
             msg = f'Refs directory does not exist or is not a directory: {refs_dir}'
             raise RepositoryError(msg)
 
-        refs: list[SymRef] = [SymRef(ref_file.name) for ref_file in refs_dir.rglob('*')
-                              if ref_file.is_file()]
+        names, _ = _scan_refs(refs_dir)
+        return [SymRef(name) for name in names]
+
+    def _read_ref_file(self, ref_file: Path) -> Ref | None:
+        """Read a ref file, reusing the previously parsed value while the file's stat data is unchanged.
+
+        :param ref_file: The ref file to read.
+        :return: The ref stored in the file, or None if the file is empty.
+        :raises RefError: If the reference format is invalid."""
+        ref_path = os.fspath(ref_file)
+        st = os.stat(ref_path)
+        key = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino, st.st_dev)
+
+        cached = self._ref_cache.get(ref_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        ref = read_ref(ref_file)
+
+        # Hash refs all have the same size, so a rewrite within the same timestamp tick
+        # would keep the stat data; only cache files that were last changed well before now
+        if max(key[0], key[1]) < time.time_ns() - MTIME_GRANULARITY_NS:
+            self._ref_cache[ref_path] = (key, ref)
+        else:
+            # Do not keep the value read before this change around
+            self._ref_cache.pop(ref_path, None)
+
+        return ref
+
+    def _get_ref_index(self) -> frozenset[str]:
+        """Get the names of all refs in the repository, rescanning only when needed.
+
+        The index is reused as long as none of the scanned ref directories has a
+        new modification time, so refs added or removed by other processes are
+        still picked up.
 
-        return refs
+        :return: The names of all refs in the repository."""
+        if self._ref_index is not None and self._ref_index_is_fresh():
+            return self._ref_index
+
+        scan_start = time.time_ns()
+        names, stamp = _scan_refs(self.refs_dir())
+        self._ref_index = frozenset(names)
+
+        # Directory mtimes are coarse, so a change landing right around the scan may
+        # not bump them. Only trust stamps that are safely older than the scan
+        racy = max(stamp.values()) >= scan_start - MTIME_GRANULARITY_NS
+        self._ref_index_stamp = None if racy else stamp
+
+        return self._ref_index
+
+    def _ref_index_is_fresh(self) -> bool:
+        if self._ref_index_stamp is None:
+            return False
+        try:
+            return all(os.stat(d).st_mtime_ns == mtime for d, mtime in self._ref_index_stamp.items())
+        except OSError:
+            return False
+
+    def _invalidate_ref_index(self) -> None:
+        self._ref_index = None
 
     @requires_repo
     def resolve_ref(self, ref: Ref | str | None) -> HashRef | None:
@@ -204,30 +294,43 @@ class Repository:
         :return: The resolved HashRef or None if the reference does not exist.
         :raises RefError: If the reference is invalid or cannot be resolved.
         :raises RepositoryNotFoundError: If the repository does not exist."""
-        match ref:
-            case HashRef():
-                return ref
-            case SymRef(ref):
-                if ref.upper() == 'HEAD':
-                    return self.resolve_ref(self.head_ref())
-
-                ref = read_ref(self.refs_dir() / ref)
-                return self.resolve_ref(ref)
-            case str():
-                # Try to figure out what kind of ref it is by looking at the list of refs
-                # in the refs directory
-                if ref.upper() == 'HEAD' or ref in self.refs():
-                    return self.resolve_ref(SymRef(ref))
-                if len(ref) == HASH_LENGTH and all(c in HASH_CHARSET for c in ref):
-                    return HashRef(ref)
-
-                msg = f'Invalid reference: {ref}'
-                raise RefError(msg)
-            case None:
-                return None
-            case _:
-                msg = f'Invalid reference type: {type(ref)}'
-                raise RefError(msg)
+        # Follow the chain iteratively, with a bound so that cyclic refs fail instead of looping
+        for _ in range(MAX_REF_DEPTH):
+            match ref:
+                case HashRef():
+                    return ref
+                case SymRef():
+                    if ref.upper() == 'HEAD':
+                        ref = self.head_ref()
+                    else:
+                        ref = self._read_ref_file(self.refs_dir() / ref)
+                case str():
+                    # Try to figure out what kind of ref it is by looking at the list of refs
+                    # in the refs directory
+                    if ref.upper() == 'HEAD':
+                        ref = SymRef(ref)
+                        continue
+
+                    refs_dir = self.refs_dir()
+                    if not refs_dir.is_dir():
+                        msg = f'Refs directory does not exist or is not a directory: {refs_dir}'
+                        raise RepositoryError(msg)
+                    if ref in self._get_ref_index():
+                        ref = SymRef(ref)
+                        continue
+                    if is_hash(ref):
+                        return HashRef(ref)
+
+                    msg = f'Invalid reference: {ref}'
+                    raise RefError(msg)
+                case None:
+                    return None
+                case _:
+                    msg = f'Invalid reference type: {type(ref)}'
+                    raise RefError(msg)
+
+        msg = f'Reference chain is longer than {MAX_REF_DEPTH} levels, possibly a ref loop'
+        raise RefError(msg)
 
     @requires_repo
     def update_ref(self, ref_name: str, new_ref: Ref) -> None:
@@ -251,6 +354,7 @@ class Repository:
 
         :raises RepositoryNotFoundError: If the repository does not exist."""
         shutil.rmtree(self.repo_path())
+        self._invalidate_ref_index()
 
     @requires_repo
     def save_file_content(self, file: Path) -> Blob:
@@ -278,6 +382,7 @@ class Repository:
             raise RepositoryError(msg)
 
         (self.heads_dir() / branch).touch()
+        self._invalidate_ref_index()
 
     @requires_repo
     def delete_branch(self, branch: str) -> None:
@@ -290,16 +395,17 @@ class Repository:
         if not branch:
             msg = 'Branch name is required'
             raise ValueError(msg)
-        branch_path = self.heads_dir() / branch
+        branch_path = os.path.join(self._heads_dir_str, branch)
 
-        if not branch_path.exists():
+        if not os.path.exists(branch_path):
             msg = f'Branch "{branch}" does not exist.'
             raise RepositoryError(msg)
         if len(self.branches()) == 1:
             msg = f'Cannot delete the last branch "{branch}".'
             raise RepositoryError(msg)
 
-        branch_path.unlink()
+        os.unlink(branch_path)
+        self._invalidate_ref_index()
 
     @requires_repo
     def branch_exists(self, branch_ref: Ref) -> bool:
@@ -308,7 +414,7 @@ class Repository:
         :param branch_ref: The reference to the branch to check.
         :return: True if the branch exists, False otherwise.
         :raises RepositoryNotFoundError: If the repository does not exist."""
-        return (self.heads_dir() / branch_ref).exists()
+        return os.path.exists(os.path.join(self._heads_dir_str, branch_ref))
 
     @requires_repo
     def branches(self) -> list[str]:
@@ -316,7 +422,8 @@ class Repository:
 
         :return: A list of branch names.
         :raises RepositoryNotFoundError: If the repository does not exist."""
-        return [x.name for x in self.heads_dir().iterdir() if x.is_file()]
+        with os.scandir(self.heads_dir()) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
 
     @requires_repo
     def save_dir(self, path: Path) -> HashRef:
@@ -330,33 +437,37 @@ class Repository:
             msg = f'{path} is not a directory'
             raise NotADirectoryError(msg)
 
-        stack = deque([path])
-        hashes: dict[Path, str] = {}
+        repo_dir_name = self.repo_dir.name
+        objects_dir = self.objects_dir()
+
+        # Post-order DFS: each directory is listed once on the way down and its tree
+        # is built on the way back up, once all of its subdirectories have been saved
+        stack: list[tuple[str, list[os.DirEntry] | None]] = [(str(path), None)]
+        hashes: dict[str, str] = {}
 
         while stack:
-            current_path = stack.pop()
+            current_path, entries = stack.pop()
+
+            if entries is None:
+                with os.scandir(current_path) as it:
+                    entries = [entry for entry in it if entry.name != repo_dir_name]
+
+                stack.append((current_path, entries))
+                stack.extend((entry.path, None) for entry in entries if entry.is_dir())
+                continue
+
             tree_records: dict[str, TreeRecord] = {}
+            for entry in entries:
+                if entry.is_file():
+                    blob = save_file_content(objects_dir, entry.path)
+                    tree_records[entry.name] = TreeRecord(TreeRecordType.BLOB, blob.hash, entry.name)
+                elif entry.is_dir():
+                    tree_records[entry.name] = TreeRecord(TreeRecordType.TREE, hashes[entry.path], entry.name)
 
-            for item in current_path.iterdir():
-                if item.name == self.repo_dir.name:
-                    continue
-                if item.is_file():
-                    blob = self.save_file_content(item)
-                    tree_records[item.name] = TreeRecord(TreeRecordType.BLOB, blob.hash, item.name)
-                elif item.is_dir():
-                    if item in hashes:  # If the directory has already been processed, use its hash
-                        subtree_hash = hashes[item]
-                        tree_records[item.name] = TreeRecord(TreeRecordType.TREE, subtree_hash, item.name)
-                    else:
-                        stack.append(current_path)
-                        stack.append(item)
-                        break
-            else:
-                tree = Tree(tree_records)
-                save_tree(self.objects_dir(), tree)
-                hashes[current_path] = hash_object(tree)
+            tree = Tree(tree_records)
+            hashes[current_path] = save_tree(objects_dir, tree)
 
-        return HashRef(hashes[path])
+        return HashRef(hashes[str(path)])
 
     @requires_repo
     def commit_working_dir(self, author: str, message: str) -> HashRef:
@@ -410,7 +521,7 @@ class Repository:
 
         try:
             while current_hash:
-                commit = load_commit(self.objects_dir(), current_hash)
+                commit = self._load_cached(self._commit_cache, current_hash, load_commit)
                 yield LogEntry(HashRef(current_hash), commit)
 
                 current_hash = HashRef(commit.parent) if commit.parent else None
@@ -435,7 +546,7 @@ class Repository:
         """
         if isinstance(t, Path):
             try:
-                root, root_hash = build_fsTree(t, tree_hashes, self.repo_dir.name)
+                root, root_hash = build_fsTree(t, tree_hashes, self.repo_dir.name, self._stat_cache)
             except NotADirectoryError as e:
                 msg = f'Path {t} is not a directory'
                 raise RepositoryError(msg) from e
@@ -450,18 +561,42 @@ class Repository:
             raise RefError(msg)
         
         try:
-            commit = load_commit(self.objects_dir(), commit_hash)
-            tree_hashes[commit.tree_hash] = load_tree(self.objects_dir(), commit.tree_hash)
+            commit = self._load_cached(self._commit_cache, commit_hash, load_commit)
+            tree_hash = commit.tree_hash
+            tree = self._load_cached(self._tree_cache, tree_hash, load_tree)
+            tree_hashes[tree_hash] = tree
         except Exception as e:
             raise RepositoryError(f"Failed to load commit {commit_hash}") from e
-        return tree_hashes[commit.tree_hash], commit.tree_hash
+        return tree, tree_hash
     
     def _load_tree(self, record_hash: str, tree_hashes: dict[str, Tree]) -> Tree:
-        if record_hash in tree_hashes:
-            return tree_hashes[record_hash]
-        # Cache miss - load from disk
-        tree_hashes[record_hash] = load_tree(self.objects_dir(), record_hash)
-        return tree_hashes[record_hash]
+        tree = tree_hashes.get(record_hash)
+        if tree is not None:
+            return tree
+        # Cache miss - try the instance cache before loading from disk
+        tree = self._load_cached(self._tree_cache, record_hash, load_tree)
+        tree_hashes[record_hash] = tree
+        return tree
+
+    def _load_cached[T](self, cache: OrderedDict[str, T], object_hash: str,
+                        loader: Callable[[Path, str], T]) -> T:
+        """Load an object through a bounded LRU cache, falling back to `loader` on a miss.
+
+        :param cache: The cache to look the object up in and to store it into.
+        :param object_hash: The hash of the object to load.
+        :param loader: The plumbing function that loads the object from the objects directory.
+        :return: The loaded object."""
+        obj = cache.get(object_hash)
+        if obj is not None:
+            cache.move_to_end(object_hash)
+            return obj
+
+        obj = loader(self.objects_dir(), object_hash)
+        cache[object_hash] = obj
+        if len(cache) > OBJECT_CACHE_SIZE:
+            cache.popitem(last=False)
+
+        return obj
     
     @requires_repo
     def diff(self, target1: Ref | Path | None = None, target2: Ref | Path | None = None) -> Sequence[Diff]:
@@ -496,41 +631,53 @@ class Repository:
             return []
 
         top_level_diff = Diff(TreeRecord(TreeRecordType.TREE, '', ''), None, [])
+        # pybind11 creates a new enum object for every .type access, so identity checks
+        # won't work; hoisting the constant at least saves the lookup in the loop
+        tree_type = TreeRecordType.TREE
         stack = [(tree1, tree2, top_level_diff)]
 
-        potentially_added: dict[str, Diff] = {}
-        potentially_removed: dict[str, Diff] = {}
+        # Unmatched added/removed diffs by record hash, with their index in their parent's
+        # children so a detected move can replace them in place
+        potentially_added: dict[str, tuple[Diff, int]] = {}
+        potentially_removed: dict[str, tuple[Diff, int]] = {}
+
+        # Added/removed subtrees that were paired into a move before being expanded. Their
+        # diffs are dropped from the result, so walking into them would only waste loads and
+        # feed their contents into move detection. Keyed by id, holding the diff to keep ids unique
+        superseded: dict[int, Diff] = {}
 
         while stack:
             current_tree1, current_tree2, parent_diff = stack.pop()
+            if id(parent_diff) in superseded:
+                continue
+
             records1 = current_tree1.records if current_tree1 else {}
             records2 = current_tree2.records if current_tree2 else {}
 
             for name, record1 in records1.items():
-                if name not in records2:
+                record2 = records2.get(name)
+                if record2 is None:
                     local_diff: Diff
 
                     # This name is no longer in the tree, so it was either moved or removed
                     # Have we seen this hash before as a potentially-added record?
                     if record1.hash in potentially_added:
-                        added_diff = potentially_added[record1.hash]
-                        del potentially_added[record1.hash]
+                        added_diff, added_index = potentially_added.pop(record1.hash)
 
                         local_diff = MovedToDiff(record1, parent_diff, [], None)
                         moved_from_diff = MovedFromDiff(added_diff.record, added_diff.parent, [], local_diff)
                         local_diff.moved_to = moved_from_diff
 
                         # Replace the original added diff with a moved-from diff
-                        added_diff.parent.children = (
-                            [_ if _.record.hash != record1.hash
-                             else moved_from_diff
-                             for _ in added_diff.parent.children])
+                        added_diff.parent.children[added_index] = moved_from_diff
+                        if added_diff.record.type == tree_type:
+                            superseded[id(added_diff)] = added_diff
 
                     else:
                         local_diff = RemovedDiff(record1, parent_diff, [])
-                        potentially_removed[record1.hash] = local_diff
+                        potentially_removed[record1.hash] = (local_diff, len(parent_diff.children))
 
-                        if record1.type == TreeRecordType.TREE:
+                        if record1.type == tree_type:
                             try:
                                 stack.append((self._load_tree(record1.hash, tree_hashes), None, local_diff))
                             except Exception as e:
@@ -539,14 +686,12 @@ class Repository:
 
                     parent_diff.children.append(local_diff)
                 else:
-                    record2 = records2[name]
-
                     # This record is identical in both trees, so no diff is needed
                     if record1.hash == record2.hash:
                         continue
 
                     # If the record is a tree, we need to recursively compare the trees
-                    if record1.type == TreeRecordType.TREE and record2.type == TreeRecordType.TREE:
+                    if record1.type == tree_type and record2.type == tree_type:
                         subtree_diff = ModifiedDiff(record1, parent_diff, [])
 
                         try:
@@ -569,24 +714,22 @@ class Repository:
                     # If we've already seen this hash, it was moved, so convert the original
                     # added diff to a moved diff
                     if record2.hash in potentially_removed:
-                        removed_diff = potentially_removed[record2.hash]
-                        del potentially_removed[record2.hash]
+                        removed_diff, removed_index = potentially_removed.pop(record2.hash)
 
                         local_diff = MovedFromDiff(record2, parent_diff, [], None)
                         moved_to_diff = MovedToDiff(removed_diff.record, removed_diff.parent, [], local_diff)
                         local_diff.moved_from = moved_to_diff
 
-                        # Create a new diff for the moved record
-                        removed_diff.parent.children = (
-                            [_ if _.record.hash != record2.hash
-                             else moved_to_diff
-                             for _ in removed_diff.parent.children])
+                        # Replace the original removed diff with a moved-to diff
+                        removed_diff.parent.children[removed_index] = moved_to_diff
+                        if removed_diff.record.type == tree_type:
+                            superseded[id(removed_diff)] = removed_diff
 
                     else:
                         local_diff = AddedDiff(record2, parent_diff, [])
-                        potentially_added[record2.hash] = local_diff
+                        potentially_added[record2.hash] = (local_diff, len(parent_diff.children))
 
-                        if record2.type == TreeRecordType.TREE:
+                        if record2.type == tree_type:
                             try:
                                 stack.append((None, self._load_tree(record2.hash, tree_hashes), local_diff))
                             except Exception as e:
@@ -601,7 +744,7 @@ class Repository:
         """Get the path to the HEAD file within the repository.
 
         :return: The path to the HEAD file."""
-        return self.repo_path() / HEAD_FILE
+        return self._head_file
     
     @requires_repo
     def tags(self) -> list[Tag]:
@@ -609,16 +752,27 @@ class Repository:
 
         :return: A list of tags.
         :raises RepositoryNotFoundError: If the repository does not exist."""
-        tags = []
-        tag_names = [x.name for x in self.tags_dir().iterdir() if x.is_file()]
+        return list(self.tags_iter())
 
-        for tag_name in tag_names:
-            tag_path = self.tags_dir() / tag_name
-            tag_object_hash = read_ref(tag_path)
-            tag = load_tag(self.objects_dir(), tag_object_hash)
-            tags.append(tag)
+    @requires_repo
+    def tags_iter(self) -> Generator[Tag, None, None]:
+        """Generate the tags in the repository, loading each tag only when it is reached.
+
+        :return: A generator yielding the tags in the repository.
+        :raises RepositoryNotFoundError: If the repository does not exist."""
+        with os.scandir(self._tags_dir_str) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    yield self._load_cached(self._tag_cache, read_ref(Path(entry.path)), load_tag)
+
+    @requires_repo
+    def has_tags(self) -> bool:
+        """Check if the repository has any tags, without loading them.
 
-        return tags
+        :return: True if at least one tag exists, False otherwise.
+        :raises RepositoryNotFoundError: If the repository does not exist."""
+        with os.scandir(self._tags_dir_str) as entries:
+            return any(entry.is_file() for entry in entries)
     
     @requires_repo
     def delete_tag(self, tag_name: str) -> None:
@@ -626,16 +780,37 @@ class Repository:
 
         :param tag_name: The name of the tag to delete.
         :raises ValueError: If the tag name is empty.
+        :raises TagNotFound: If the tag does not exist.
         :raises RepositoryNotFoundError: If the repository does not exist."""
-        if not tag_name:
-            msg = 'Tag name is required'
-            raise ValueError(msg)
-        tag_path = self.tags_dir() / tag_name
+        self.delete_tags([tag_name])
+
+    @requires_repo
+    def delete_tags(self, tag_names: Sequence[str]) -> None:
+        """Delete several tags from the repository.
 
-        if not tag_path.exists():
-            raise TagNotFound(tag_name)
+        Every name is checked before any tag is deleted.
 
-        tag_path.unlink()
+        :param tag_names: The names of the tags to delete.
+        :raises ValueError: If a tag name is empty.
+        :raises TagNotFound: If a tag does not exist.
+        :raises RepositoryNotFoundError: If the repository does not exist."""
+        tag_paths = []
+        # A name given twice is deleted once
+        for tag_name in dict.fromkeys(tag_names):
+            if not tag_name:
+                msg = 'Tag name is required'
+                raise ValueError(msg)
+            tag_path = os.path.join(self._tags_dir_str, tag_name)
+
+            if not os.path.exists(tag_path):
+                raise TagNotFound(tag_name)
+            tag_paths.append(tag_path)
+
+        try:
+            for tag_path in tag_paths:
+                os.unlink(tag_path)
+        finally:
+            self._invalidate_ref_index()
     
     @requires_repo
     def create_tag(self, tag_name: str, commit_hash: str, author: str, message: str) -> None:
@@ -648,50 +823,117 @@ class Repository:
         :raises ValueError: If the tag name is empty.
         :raises RepositoryError: If the tag already exists.
         :raises RepositoryNotFoundError: If the repository does not exist."""
-        if not tag_name:
-            msg = 'Tag name is required'
-            raise ValueError(msg)
-                
-        if not commit_hash or len(commit_hash) != HASH_LENGTH or not all(c in HASH_CHARSET for c in commit_hash):
-            msg = f'Invalid commit hash: {commit_hash}'
-            raise ValueError(msg)
-        
-        if not author:
-            msg = 'Tag author is required'
-            raise ValueError(msg)
-        
-        if not message:
-            msg = 'Tag message is required'
-            raise ValueError(msg)
-        
-        # Verify that the commit exists
-        if not (self.objects_dir() / commit_hash[:2] / commit_hash).is_file():
-            raise UnknownHashError(commit_hash)
-        
-        try:
-            commit = load_commit(self.objects_dir(), HashRef(commit_hash))
+        self.create_tags([(tag_name, commit_hash, author, message)])
 
-        except Exception as e:
-            raise RepositoryError(e) from e
-        
-        tag_path = self.tags_dir() / tag_name
+    @requires_repo
+    def create_tags(self, tags: Iterable[tuple[str, str, str, str]]) -> None:
+        """Add several new tags to the repository.
+
+        Every tag is validated before any of them is written, and each distinct commit is loaded only once.
+        If writing a tag fails, the tags already written by this call are removed again.
 
-        # Check if the tag already exists, to avoid overwriting
-        if tag_path.exists():
-            raise TagExistsError(tag_path)
+        :param tags: The tags to add, each given as (tag name, commit hash, author, message).
+        :raises ValueError: If a tag name is empty, a commit hash is invalid, or an author or message is missing.
+        :raises UnknownHashError: If a commit hash does not exist in the repository.
+        :raises TagExistsError: If a tag already exists or is given more than once.
+        :raises RepositoryError: If a commit hash does not point to a commit.
+        :raises RepositoryNotFoundError: If the repository does not exist."""
+        # The tags are walked twice, once to validate and once to write
+        tags = list(tags)
+        objects_dir = self.objects_dir()
+        tags_dir = self.tags_dir()
+        tag_paths: dict[str, Path] = {}
 
+        for tag_name, commit_hash, author, message in tags:
+            if not tag_name:
+                msg = 'Tag name is required'
+                raise ValueError(msg)
+
+            if not commit_hash or not is_hash(commit_hash):
+                msg = f'Invalid commit hash: {commit_hash}'
+                raise ValueError(msg)
+
+            if not author:
+                msg = 'Tag author is required'
+                raise ValueError(msg)
+
+            if not message:
+                msg = 'Tag message is required'
+                raise ValueError(msg)
+
+            # Verify that the commit exists. Commits already in the cache need no disk access; otherwise the
+            # object is stat-ed first, since loading a missing object would create its shard directory
+            if commit_hash not in self._commit_cache:
+                if not (objects_dir / commit_hash[:2] / commit_hash).is_file():
+                    raise UnknownHashError(commit_hash)
+
+                try:
+                    self._load_cached(self._commit_cache, commit_hash, load_commit)
+                except Exception as e:
+                    raise RepositoryError(e) from e
+
+            tag_path = tags_dir / tag_name
+
+            # Check if the tag already exists, to avoid overwriting
+            if tag_name in tag_paths or tag_path.exists():
+                raise TagExistsError(tag_path)
+            tag_paths[tag_name] = tag_path
+
+        timestamp = int(datetime.now().timestamp())
+        written: list[Path] = []
         try:
-            tag_obj = Tag(tag_name, commit_hash, author, message, int(datetime.now().timestamp()))
-            tag_object_hash = hash_object(tag_obj)
-            save_tag(self.objects_dir(), tag_obj)
-            write_ref(tag_path, tag_object_hash)
-        except RefError as e:
-            raise TagError(f"Failed to write tag to {tag_path}: {e}") from e
-        
+            for tag_name, commit_hash, author, message in tags:
+                tag_path = tag_paths[tag_name]
+                tag_obj = Tag(tag_name, commit_hash, author, message, timestamp)
+                save_tag(objects_dir, tag_obj)
+                # Created exclusively, so a tag made by another process since the check above is never overwritten
+                write_ref(tag_path, hash_object(tag_obj), exclusive=True)
+                written.append(tag_path)
+        except Exception as e:
+            # Only the refs written by this call are removed; the tag objects are left, as unreferenced objects are
+            for written_path in written:
+                written_path.unlink(missing_ok=True)
+
+            match e:
+                case FileExistsError():
+                    raise TagExistsError(tag_path) from e
+                case RefError():
+                    raise TagError(f"Failed to write tag to {tag_path}: {e}") from e
+            raise
+        finally:
+            self._invalidate_ref_index()
+
     @requires_repo
     def status(self) -> Sequence[Diff]:
         return self.diff(self.head_commit(), self.working_dir)
 
+def _scan_refs(refs_dir: Path) -> tuple[list[str], dict[str, int]]:
+    """Collect the names of all reference files under a refs directory.
+
+    Uses os.scandir so file and directory checks come from the directory listing
+    instead of a separate stat per entry.
+
+    :param refs_dir: The refs directory to scan.
+    :return: The names of all reference files found, at any depth, and the modification time of every
+        directory scanned, taken before it was listed."""
+    names: list[str] = []
+    dir_mtimes: dict[str, int] = {}
+    pending = [str(refs_dir)]
+
+    while pending:
+        current = pending.pop()
+        dir_mtimes[current] = os.stat(current).st_mtime_ns
+
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+                elif entry.is_file():
+                    names.append(entry.name)
+
+    return names, dir_mtimes
+
+
 def branch_ref(branch: str) -> SymRef:
     """Create a symbolic reference for a branch name.
 
@@ -9,7 +9,7 @@ namespace py = pybind11;
 
 PYBIND11_MODULE(_libcaf, m) {
     // caf
-    m.def("hash_file", hash_file);
+    m.def("hash_file", hash_file, py::call_guard<py::gil_scoped_release>());
     m.def("hash_string", hash_string);
     m.def("hash_length", hash_length);
     m.def("save_file_content", save_file_content);
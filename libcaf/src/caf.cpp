@@ -21,12 +21,16 @@
 #include "caf.h"
 
 constexpr size_t BUFFER_SIZE = 4096;
+constexpr size_t HASH_BUFFER_SIZE = 1 << 16;
+constexpr size_t COPY_CHUNK_SIZE = 1 << 30;
 constexpr size_t DIR_NAME_SIZE = 2;
 
 std::string create_sub_dir(const std::string& content_root_dir, const std::string& hash);
 void lock_file_with_timeout(int fd, int operation, int timeout_sec);
 void copy_file(const std::string& src, const std::string& dest);
+void copy_fd(int src_fd, int dest_fd);
 void create_content_path(const std::string& content_root_dir, const std::string& hash, std::string& output_path);
+bool content_is_stored(const std::string& content_path, off_t expected_size);
 
 std::string hash_file(const std::string& filename) {
     unsigned char hash[EVP_MAX_MD_SIZE];
@@ -48,9 +52,9 @@ std::string hash_file(const std::string& filename) {
         throw std::runtime_error("Failed to open file");
     }
 
-    std::vector<char> buffer(BUFFER_SIZE);
-    while (file.read(buffer.data(), BUFFER_SIZE)) {
-        if (EVP_DigestUpdate(mdctx, buffer.data(), BUFFER_SIZE) != 1){
+    std::vector<char> buffer(HASH_BUFFER_SIZE);
+    while (file.read(buffer.data(), HASH_BUFFER_SIZE)) {
+        if (EVP_DigestUpdate(mdctx, buffer.data(), HASH_BUFFER_SIZE) != 1){
             EVP_MD_CTX_free(mdctx);
             throw std::runtime_error("Failed to update digest");
         }
@@ -136,9 +140,17 @@ Blob save_file_content(const std::string& content_root_dir, const std::string& f
 
     std::string file_hash = hash_file(file_path);
 
+    struct stat file_stat;
+    if (stat(file_path.c_str(), &file_stat) != 0)
+        throw std::runtime_error("Failed to stat file");
+
     std::string content_path;
     create_content_path(content_root_dir, file_hash, content_path);
 
+    // Objects are content-addressed, so a stored object with this hash already holds these bytes
+    if (content_is_stored(content_path, file_stat.st_size))
+        return Blob(file_hash);
+
     int fd = open(content_path.c_str(), O_WRONLY | O_CREAT, 0644);
 
     if (fd < 0)
@@ -249,43 +261,103 @@ int open_content_for_reading(const std::string& content_root_dir, const std::str
 }
 
 void copy_file(const std::string& src, const std::string& dest) {
-    std::ifstream source_file(src, std::ios::binary);
-    if (!source_file) {
+    int src_fd = open(src.c_str(), O_RDONLY);
+    if (src_fd < 0) {
         throw std::runtime_error("Failed to open source file");
     }
 
-    std::ofstream dest_file(dest, std::ios::binary);
-    if (!dest_file) {
+    int dest_fd = open(dest.c_str(), O_WRONLY | O_CREAT | O_TRUNC, 0644);
+    if (dest_fd < 0) {
+        close(src_fd);
         throw std::runtime_error("Failed to open destination file");
     }
 
-    std::vector<char> buffer(BUFFER_SIZE);
-    while (source_file.read(buffer.data(), BUFFER_SIZE)) {
-        if (!dest_file.write(buffer.data(), BUFFER_SIZE)) {
-            throw std::runtime_error("Failed to write to destination file");
-        }
+    try {
+        copy_fd(src_fd, dest_fd);
+    } catch (const std::exception& e) {
+        close(src_fd);
+        close(dest_fd);
+        throw;
+    }
+
+    close(src_fd);
+    if (close(dest_fd) != 0) {
+        throw std::runtime_error("Failed to close destination file");
+    }
+}
 
-        if (dest_file.fail()) {
-            throw std::runtime_error("Error while writing to destination file");
+void copy_fd(int src_fd, int dest_fd) {
+#ifdef __linux__
+    // Let the kernel move the bytes without bouncing them through a user-space buffer.
+    // Fall back to read/write if the filesystems involved do not support copy_file_range.
+    bool copied_any = false;
+    while (true) {
+        ssize_t copied = copy_file_range(src_fd, nullptr, dest_fd, nullptr, COPY_CHUNK_SIZE, 0);
+        if (copied == 0) {
+            // Some filesystems (procfs, sysfs, some FUSE mounts) report 0 without copying anything,
+            // so a 0 on the first call is not trusted as EOF; read/write decides instead
+            if (!copied_any)
+                break;
+            return;
+        }
+        if (copied > 0) {
+            copied_any = true;
+            continue;
         }
+        if (errno == EINTR)
+            continue;
+        if (!copied_any && (errno == ENOSYS || errno == EXDEV || errno == EINVAL || errno == EOPNOTSUPP))
+            break;
+        throw std::runtime_error("Failed to copy to destination file");
     }
+#endif
 
-    // Handle the last partial read
-    if (source_file.gcount() > 0) {
-        if (!dest_file.write(buffer.data(), source_file.gcount())) {
-            throw std::runtime_error("Failed to write to destination file");
+    std::vector<char> buffer(BUFFER_SIZE);
+    while (true) {
+        ssize_t bytes_read = read(src_fd, buffer.data(), BUFFER_SIZE);
+        if (bytes_read == 0)
+            return;
+        if (bytes_read < 0) {
+            if (errno == EINTR)
+                continue;
+            throw std::runtime_error("Failed to read source file");
         }
 
-        if (dest_file.fail()) {
-            throw std::runtime_error("Error while writing to destination file");
+        ssize_t offset = 0;
+        while (offset < bytes_read) {
+            ssize_t written = write(dest_fd, buffer.data() + offset, bytes_read - offset);
+            if (written < 0) {
+                if (errno == EINTR)
+                    continue;
+                throw std::runtime_error("Failed to write to destination file");
+            }
+            offset += written;
         }
     }
+}
+
+bool content_is_stored(const std::string& content_path, off_t expected_size) {
+    int fd = open(content_path.c_str(), O_RDONLY);
+    if (fd < 0)
+        return false;
 
-    // Explicit flush to ensure all data is written
-    dest_file.flush();
-    if (dest_file.fail()) {
-        throw std::runtime_error("Failed to flush destination file");
+    // Taking the lock waits out a writer that is still copying the content in, and the size
+    // check catches an object that was created but whose writer has not started yet
+    try {
+        lock_file_with_timeout(fd, LOCK_EX, 10);
+    } catch (const std::exception& e) {
+        close(fd);
+        throw;
     }
+
+    struct stat content_stat;
+    bool stored = fstat(fd, &content_stat) == 0 && content_stat.st_nlink > 0 &&
+                  content_stat.st_size == expected_size;
+
+    flock(fd, LOCK_UN);
+    close(fd);
+
+    return stored;
 }
 
 void create_content_path(const std::string& content_root_dir, const std::string& hash, std::string& output_path) {
@@ -70,7 +70,8 @@ Commit load_commit(const std::string &root_dir, const std::string &commit_hash)
     return Commit(tree_hash, author, message, timestamp, parent);
 }
 
-void save_tree(const std::string &root_dir, const Tree &tree) {
+// Serialize Tree to disk and return its hash, so callers don't have to hash it again
+std::string save_tree(const std::string &root_dir, const Tree &tree) {
     std::string tree_hash = hash_object(tree);
 
     int fd = open_content_for_writing(root_dir, tree_hash);
@@ -90,6 +91,8 @@ void save_tree(const std::string &root_dir, const Tree &tree) {
         delete_content(root_dir, tree_hash);
         throw;
     }
+
+    return tree_hash;
 }
 
 Tree load_tree(const std::string &root_dir, const std::string &tree_hash) {
@@ -13,7 +13,7 @@
 
 void save_commit(const std::string &root_dir, const Commit &commit);
 Commit load_commit(const std::string &root_dir, const std::string &hash);
-void save_tree(const std::string &root_dir, const Tree &tree);
+std::string save_tree(const std::string &root_dir, const Tree &tree);
 Tree load_tree(const std::string &root_dir, const std::string &hash);
 void save_tag(const std::string &root_dir, const Tag &tag);
 Tag load_tag(const std::string &root_dir, const std::string &hash);
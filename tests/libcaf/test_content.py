@@ -1,4 +1,5 @@
 import hashlib
+import os
 from pathlib import Path
 
 from libcaf.plumbing import (delete_content, hash_file, open_content_for_reading, open_content_for_writing,
@@ -18,6 +19,21 @@ class TestNonExistentContent:
         delete_content(temp_repo_dir, non_existent_hash)
 
 
+# copy_file_range cannot copy procfs files: current kernels reject them with EXDEV and older ones
+# return 0 without copying anything, so saving one has to store the real bytes through read/write
+@mark.skipif(not Path('/proc/version').is_file(), reason='requires procfs')
+def test_save_file_content_from_procfs(temp_repo_dir: Path) -> None:
+    proc_file = Path('/proc/version')
+    expected_content = proc_file.read_bytes()
+    assert expected_content
+
+    blob = save_file_content(temp_repo_dir, proc_file)
+
+    assert blob.hash == hashlib.sha1(expected_content).hexdigest()
+    saved_file = temp_repo_dir / f'{blob.hash[:2]}/{blob.hash}'
+    assert saved_file.read_bytes() == expected_content
+
+
 @mark.parametrize('temp_content_length', [0, 1, 10, 100, 1000, 10000, 100000, 1000000])
 class TestContent:
     def test_hash_file(self, temp_content: tuple[Path, str]) -> None:
@@ -39,6 +55,18 @@ class TestContent:
         saved_content = saved_file.read_bytes()
         assert saved_content == expected_content
 
+    def test_save_file_content_existing_object_is_not_rewritten(self, temp_repo_dir: Path,
+                                                                temp_content: tuple[Path, str]) -> None:
+        file, expected_content = temp_content
+
+        blob = save_file_content(temp_repo_dir, file)
+        saved_file = temp_repo_dir / f'{blob.hash[:2]}/{blob.hash}'
+        os.utime(saved_file, ns=(0, 0))
+
+        assert save_file_content(temp_repo_dir, file).hash == blob.hash
+        assert saved_file.stat().st_mtime_ns == 0
+        assert saved_file.read_bytes() == expected_content
+
     def test_open_content_for_reading(self, temp_repo_dir: Path, temp_content: tuple[Path, str]) -> None:
         file, expected_content = temp_content
 
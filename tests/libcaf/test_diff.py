@@ -1,20 +1,63 @@
 from collections.abc import Sequence
-import shutil
+import os
+from shutil import move, rmtree
+from typing import NamedTuple
+from libcaf.internal import StatCache, build_fsTree
+from libcaf.plumbing import hash_file
 from libcaf.repository import (AddedDiff, Diff, ModifiedDiff, MovedFromDiff, MovedToDiff, RemovedDiff, Repository)
 
-def split_diffs_by_type(diffs: Sequence[Diff]) -> \
-        tuple[list[AddedDiff],
-        list[ModifiedDiff],
-        list[MovedToDiff],
-        list[MovedFromDiff],
-        list[RemovedDiff]]:
-    added = [d for d in diffs if isinstance(d, AddedDiff)]
-    moved_to = [d for d in diffs if isinstance(d, MovedToDiff)]
-    moved_from = [d for d in diffs if isinstance(d, MovedFromDiff)]
-    removed = [d for d in diffs if isinstance(d, RemovedDiff)]
-    modified = [d for d in diffs if isinstance(d, ModifiedDiff)]
+class DiffsByType(NamedTuple):
+    added: list[AddedDiff]
+    modified: list[ModifiedDiff]
+    moved_to: list[MovedToDiff]
+    moved_from: list[MovedFromDiff]
+    removed: list[RemovedDiff]
+
+
+def split_diffs_by_type(diffs: Sequence[Diff]) -> DiffsByType:
+    if not diffs:
+        return DiffsByType([], [], [], [], [])
+
+    added: list[AddedDiff] = []
+    modified: list[ModifiedDiff] = []
+    moved_to: list[MovedToDiff] = []
+    moved_from: list[MovedFromDiff] = []
+    removed: list[RemovedDiff] = []
+
+    # One pass over the diffs, dispatching on the exact diff class
+    buckets = {
+        AddedDiff: added.append,
+        ModifiedDiff: modified.append,
+        MovedToDiff: moved_to.append,
+        MovedFromDiff: moved_from.append,
+        RemovedDiff: removed.append,
+    }
+    for d in diffs:
+        append = buckets.get(type(d))
+        if append is None:
+            # Subclasses of the diff classes still land in their base class's bucket
+            append = next((bucket_append for diff_type, bucket_append in buckets.items()
+                           if isinstance(d, diff_type)), None)
+        if append:
+            append(d)
+
+    return DiffsByType(added, modified, moved_to, moved_from, removed)
+
+
+def diffs_by_name[D: Diff](diffs: Sequence[D]) -> dict[str, D]:
+    return {d.record.name: d for d in diffs}
+
+
+def assert_single_diff[D: Diff](diffs: Sequence[Diff], diff_type: type[D]) -> D:
+    assert len(diffs) == 1
+    diff = diffs[0]
+    assert isinstance(diff, diff_type)
+
+    return diff
+
 
-    return added, modified, moved_to, moved_from, removed
+def diff_head_to_workdir(repo: Repository) -> Sequence[Diff]:
+    return repo.diff(repo.head_commit(), repo.working_dir)
 
 
 def test_diff_head(temp_repo: Repository) -> None:
@@ -22,7 +65,7 @@ def test_diff_head(temp_repo: Repository) -> None:
     file_path.write_text('Same content')
 
     temp_repo.commit_working_dir('Tester', 'Initial commit')
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diff_result = diff_head_to_workdir(temp_repo)
 
     assert len(diff_result) == 0
 
@@ -47,16 +90,8 @@ def test_diff_added_file(temp_repo: Repository) -> None:
     temp_repo.commit_working_dir('Tester', 'Added file2')
 
     diff_result = temp_repo.diff(commit1_hash, temp_repo.head_commit())
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 1
-    assert added[0].record.name == 'file2.txt'
-
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-    assert len(modified) == 0
+    added_diff = assert_single_diff(diff_result, AddedDiff)
+    assert added_diff.record.name == 'file2.txt'
 
 
 def test_diff_removed_file(temp_repo: Repository) -> None:
@@ -68,16 +103,8 @@ def test_diff_removed_file(temp_repo: Repository) -> None:
     temp_repo.commit_working_dir('Tester', 'File deleted')
 
     diff_result = temp_repo.diff(commit1_hash, temp_repo.head_commit())
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(modified) == 0
-
-    assert len(removed) == 1
-    assert removed[0].record.name == 'file.txt'
+    removed_diff = assert_single_diff(diff_result, RemovedDiff)
+    assert removed_diff.record.name == 'file.txt'
 
 
 def test_diff_modified_file(temp_repo: Repository) -> None:
@@ -89,16 +116,8 @@ def test_diff_modified_file(temp_repo: Repository) -> None:
     commit2 = temp_repo.commit_working_dir('Tester', 'Modified file')
 
     diff_result = temp_repo.diff(commit1, commit2)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-
-    assert len(modified) == 1
-    assert modified[0].record.name == 'file.txt'
+    modified_diff = assert_single_diff(diff_result, ModifiedDiff)
+    assert modified_diff.record.name == 'file.txt'
 
 
 def test_diff_nested_directory(temp_repo: Repository) -> None:
@@ -112,18 +131,10 @@ def test_diff_nested_directory(temp_repo: Repository) -> None:
     commit2 = temp_repo.commit_working_dir('Tester', 'Modified nested file')
 
     diff_result = temp_repo.diff(commit1, commit2)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-
-    assert len(modified) == 1
-    assert modified[0].record.name == 'subdir'
-    assert len(modified[0].children) == 1
-    assert modified[0].children[0].record.name == 'file.txt'
+    modified_diff = assert_single_diff(diff_result, ModifiedDiff)
+    assert modified_diff.record.name == 'subdir'
+    assert len(modified_diff.children) == 1
+    assert modified_diff.children[0].record.name == 'file.txt'
 
 
 def test_diff_nested_trees(temp_repo: Repository) -> None:
@@ -157,27 +168,26 @@ def test_diff_nested_trees(temp_repo: Repository) -> None:
 
     assert len(modified) == 2
 
-    # We don't know the order of modified directories, so first check if the names exist
-    # and then use their indices
-    dir_names = [mod.record.name for mod in modified]
+    # We don't know the order of modified directories, so look them up by name
+    by_name = diffs_by_name(modified)
 
-    assert 'dir1' in dir_names
-    dir1_index = dir_names.index('dir1')
+    assert 'dir1' in by_name
+    dir1_diff = by_name['dir1']
 
-    assert modified[dir1_index].record.name == 'dir1'
-    assert len(modified[dir1_index].children) == 1
-    assert modified[dir1_index].children[0].record.name == 'file_a.txt'
-    assert isinstance(modified[dir1_index].children[0], ModifiedDiff)
+    assert dir1_diff.record.name == 'dir1'
+    assert len(dir1_diff.children) == 1
+    assert dir1_diff.children[0].record.name == 'file_a.txt'
+    assert isinstance(dir1_diff.children[0], ModifiedDiff)
 
-    assert 'dir2' in dir_names
-    dir2_index = dir_names.index('dir2')
+    assert 'dir2' in by_name
+    dir2_diff = by_name['dir2']
 
-    assert modified[dir2_index].record.name == 'dir2'
-    assert len(modified[dir2_index].children) == 2
-    assert modified[dir2_index].children[0].record.name == 'file_b.txt'
-    assert isinstance(modified[dir2_index].children[0], RemovedDiff)
-    assert modified[dir2_index].children[1].record.name == 'file_c.txt'
-    assert isinstance(modified[dir2_index].children[1], AddedDiff)
+    assert dir2_diff.record.name == 'dir2'
+    assert len(dir2_diff.children) == 2
+    assert dir2_diff.children[0].record.name == 'file_b.txt'
+    assert isinstance(dir2_diff.children[0], RemovedDiff)
+    assert dir2_diff.children[1].record.name == 'file_c.txt'
+    assert isinstance(dir2_diff.children[1], AddedDiff)
 
 
 def test_diff_moved_file_added_first(temp_repo: Repository) -> None:
@@ -208,17 +218,16 @@ def test_diff_moved_file_added_first(temp_repo: Repository) -> None:
 
     assert len(modified) == 2
 
-    # We don't know the order of modified directories, so first check if the names exist
-    # and then use their indices
-    dir_names = [mod.record.name for mod in modified]
+    # We don't know the order of modified directories, so look them up by name
+    by_name = diffs_by_name(modified)
 
-    assert 'dir1' in dir_names
-    dir1_index = dir_names.index('dir1')
+    assert 'dir1' in by_name
+    dir1_diff = by_name['dir1']
 
-    assert modified[dir1_index].record.name == 'dir1'
-    assert len(modified[dir1_index].children) == 1
+    assert dir1_diff.record.name == 'dir1'
+    assert len(dir1_diff.children) == 1
 
-    modified_child = modified[dir1_index].children[0]
+    modified_child = dir1_diff.children[0]
     assert isinstance(modified_child, MovedToDiff)
     assert modified_child.record.name == 'file_a.txt'
 
@@ -228,13 +237,13 @@ def test_diff_moved_file_added_first(temp_repo: Repository) -> None:
     assert len(modified_child.moved_to.parent.children) == 1
     assert modified_child.moved_to.record.name == 'file_c.txt'
 
-    assert 'dir2' in dir_names
-    dir2_index = dir_names.index('dir2')
+    assert 'dir2' in by_name
+    dir2_diff = by_name['dir2']
 
-    assert modified[dir2_index].record.name == 'dir2'
-    assert len(modified[dir2_index].children) == 1
+    assert dir2_diff.record.name == 'dir2'
+    assert len(dir2_diff.children) == 1
 
-    modified_child = modified[dir2_index].children[0]
+    modified_child = dir2_diff.children[0]
     assert isinstance(modified_child, MovedFromDiff)
     assert modified_child.record.name == 'file_c.txt'
 
@@ -273,17 +282,16 @@ def test_diff_moved_file_removed_first(temp_repo: Repository) -> None:
 
     assert len(modified) == 2
 
-    # We don't know the order of modified directories, so first check if the names exist
-    # and then use their indices
-    dir_names = [mod.record.name for mod in modified]
+    # We don't know the order of modified directories, so look them up by name
+    by_name = diffs_by_name(modified)
 
-    assert 'dir1' in dir_names
-    dir1_index = dir_names.index('dir1')
+    assert 'dir1' in by_name
+    dir1_diff = by_name['dir1']
 
-    assert modified[dir1_index].record.name == 'dir1'
-    assert len(modified[dir1_index].children) == 1
+    assert dir1_diff.record.name == 'dir1'
+    assert len(dir1_diff.children) == 1
 
-    modified_child = modified[dir1_index].children[0]
+    modified_child = dir1_diff.children[0]
     assert isinstance(modified_child, MovedFromDiff)
     assert modified_child.record.name == 'file_c.txt'
 
@@ -293,13 +301,13 @@ def test_diff_moved_file_removed_first(temp_repo: Repository) -> None:
     assert len(modified_child.moved_from.parent.children) == 1
     assert modified_child.moved_from.record.name == 'file_b.txt'
 
-    assert 'dir2' in dir_names
-    dir2_index = dir_names.index('dir2')
+    assert 'dir2' in by_name
+    dir2_diff = by_name['dir2']
 
-    assert modified[dir2_index].record.name == 'dir2'
-    assert len(modified[dir2_index].children) == 1
+    assert dir2_diff.record.name == 'dir2'
+    assert len(dir2_diff.children) == 1
 
-    modified_child = modified[dir2_index].children[0]
+    modified_child = dir2_diff.children[0]
     assert isinstance(modified_child, MovedToDiff)
     assert modified_child.record.name == 'file_b.txt'
 
@@ -309,13 +317,41 @@ def test_diff_moved_file_removed_first(temp_repo: Repository) -> None:
     assert modified_child.moved_to.parent.record.name == 'dir1'
     assert modified_child.moved_to.record.name == 'file_c.txt'
 
+def test_diff_moved_file_with_duplicate_content(temp_repo: Repository) -> None:
+    (temp_repo.working_dir / 'dup1.txt').write_text('Same content')
+    (temp_repo.working_dir / 'dup2.txt').write_text('Same content')
+    commit1_hash = temp_repo.commit_working_dir('Tester', 'Two identical files')
+
+    (temp_repo.working_dir / 'dup1.txt').unlink()
+    (temp_repo.working_dir / 'dup2.txt').unlink()
+    sub_dir = temp_repo.working_dir / 'sub'
+    sub_dir.mkdir()
+    (sub_dir / 'moved.txt').write_text('Same content')
+    temp_repo.commit_working_dir('Tester', 'Removed one, moved the other')
+
+    diff_result = temp_repo.diff(commit1_hash, temp_repo.head_commit())
+    added, modified, moved_to, moved_from, removed = \
+        split_diffs_by_type(diff_result)
+
+    # Only one of the identical files can be the source of the move
+    assert len(moved_to) == 1
+    assert len(removed) == 1
+    assert {moved_to[0].record.name, removed[0].record.name} == {'dup1.txt', 'dup2.txt'}
+    assert moved_to[0].moved_to.record.name == 'moved.txt'
+
+    assert len(added) == 1
+    assert added[0].record.name == 'sub'
+    assert len(moved_from) == 0
+    assert len(modified) == 0
+
+
 def test_diff_workdir_clean(temp_repo: Repository) -> None:
     file_path = temp_repo.working_dir / 'file.txt'
     file_path.write_text('Same content')
 
     temp_repo.commit_working_dir('Tester', 'Initial commit')
     
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diff_result = diff_head_to_workdir(temp_repo)
 
     assert len(diff_result) == 0
 
@@ -327,17 +363,9 @@ def test_diff_workdir_added_file(temp_repo: Repository) -> None:
     file2 = temp_repo.working_dir / 'file2.txt'
     file2.write_text('Content 2')
 
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 1
-    assert added[0].record.name == 'file2.txt'
-
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-    assert len(modified) == 0
+    diff_result = diff_head_to_workdir(temp_repo)
+    added_diff = assert_single_diff(diff_result, AddedDiff)
+    assert added_diff.record.name == 'file2.txt'
 
 def test_diff_workdir_removed_file(temp_repo: Repository) -> None:
     file1 = temp_repo.working_dir / 'file.txt'
@@ -347,17 +375,9 @@ def test_diff_workdir_removed_file(temp_repo: Repository) -> None:
     # Delete the file from working directory
     file1.unlink()
 
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(modified) == 0
-
-    assert len(removed) == 1
-    assert removed[0].record.name == 'file.txt'
+    diff_result = diff_head_to_workdir(temp_repo)
+    removed_diff = assert_single_diff(diff_result, RemovedDiff)
+    assert removed_diff.record.name == 'file.txt'
 
 def test_diff_workdir_modified_file(temp_repo: Repository) -> None:
     file1 = temp_repo.working_dir / 'file.txt'
@@ -367,17 +387,9 @@ def test_diff_workdir_modified_file(temp_repo: Repository) -> None:
     # Modify the file in working directory
     file1.write_text('New content')
 
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-
-    assert len(modified) == 1
-    assert modified[0].record.name == 'file.txt'
+    diff_result = diff_head_to_workdir(temp_repo)
+    modified_diff = assert_single_diff(diff_result, ModifiedDiff)
+    assert modified_diff.record.name == 'file.txt'
 
 def test_diff_workdir_nested_directory(temp_repo: Repository) -> None:
     subdir = temp_repo.working_dir / 'subdir'
@@ -389,22 +401,14 @@ def test_diff_workdir_nested_directory(temp_repo: Repository) -> None:
     # Modify file inside subdir
     nested_file.write_text('Modified')
 
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
-    added, modified, moved_to, moved_from, removed = \
-        split_diffs_by_type(diff_result)
-
-    assert len(added) == 0
-    assert len(moved_to) == 0
-    assert len(moved_from) == 0
-    assert len(removed) == 0
-
-    assert len(modified) == 1
-    assert modified[0].record.name == 'subdir'
+    diff_result = diff_head_to_workdir(temp_repo)
+    modified_diff = assert_single_diff(diff_result, ModifiedDiff)
+    assert modified_diff.record.name == 'subdir'
 
     # Check children of the directory diff
-    assert len(modified[0].children) == 1
-    assert modified[0].children[0].record.name == 'file.txt'
-    assert isinstance(modified[0].children[0], ModifiedDiff)
+    assert len(modified_diff.children) == 1
+    assert modified_diff.children[0].record.name == 'file.txt'
+    assert isinstance(modified_diff.children[0], ModifiedDiff)
 
 def test_diff_workdir_nested_trees_complex(temp_repo: Repository) -> None:
     dir1 = temp_repo.working_dir / 'dir1'
@@ -425,7 +429,7 @@ def test_diff_workdir_nested_trees_complex(temp_repo: Repository) -> None:
     file_c = dir2 / 'file_c.txt'
     file_c.write_text('C1')
 
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diff_result = diff_head_to_workdir(temp_repo)
     added, modified, moved_to, moved_from, removed = \
         split_diffs_by_type(diff_result)
 
@@ -437,30 +441,28 @@ def test_diff_workdir_nested_trees_complex(temp_repo: Repository) -> None:
     # We expect 2 modified directories at top level
     assert len(modified) == 2
 
-    dir_names = [mod.record.name for mod in modified]
+    by_name = diffs_by_name(modified)
 
-    assert 'dir1' in dir_names
-    dir1_index = dir_names.index('dir1')
-    assert modified[dir1_index].record.name == 'dir1'
-    assert len(modified[dir1_index].children) == 1
-    assert modified[dir1_index].children[0].record.name == 'file_a.txt'
-    assert isinstance(modified[dir1_index].children[0], ModifiedDiff)
+    assert 'dir1' in by_name
+    dir1_diff = by_name['dir1']
+    assert dir1_diff.record.name == 'dir1'
+    assert len(dir1_diff.children) == 1
+    assert dir1_diff.children[0].record.name == 'file_a.txt'
+    assert isinstance(dir1_diff.children[0], ModifiedDiff)
 
-    assert 'dir2' in dir_names
-    dir2_index = dir_names.index('dir2')
-    assert modified[dir2_index].record.name == 'dir2'
-    assert len(modified[dir2_index].children) == 2
+    assert 'dir2' in by_name
+    dir2_diff = by_name['dir2']
+    assert dir2_diff.record.name == 'dir2'
+    assert len(dir2_diff.children) == 2
 
     # Children order might vary, so checking existence
-    child_names = [child.record.name for child in modified[dir2_index].children]
+    children_by_name = diffs_by_name(dir2_diff.children)
 
-    assert 'file_b.txt' in child_names
-    b_index = child_names.index('file_b.txt')
-    assert isinstance(modified[dir2_index].children[b_index], RemovedDiff)
+    assert 'file_b.txt' in children_by_name
+    assert isinstance(children_by_name['file_b.txt'], RemovedDiff)
 
-    assert 'file_c.txt' in child_names
-    c_index = child_names.index('file_c.txt')
-    assert isinstance(modified[dir2_index].children[c_index], AddedDiff)
+    assert 'file_c.txt' in children_by_name
+    assert isinstance(children_by_name['file_c.txt'], AddedDiff)
 
 def test_diff_workdir_moved_file(temp_repo: Repository) -> None:
     dir1 = temp_repo.working_dir / 'dir1'
@@ -475,27 +477,25 @@ def test_diff_workdir_moved_file(temp_repo: Repository) -> None:
 
     file_a.rename(dir2 / 'file_a.txt')
 
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diff_result = diff_head_to_workdir(temp_repo)
     added, modified, moved_to, moved_from, removed = \
         split_diffs_by_type(diff_result)
 
     # Since we modified directories (dir1 and dir2), the moves are nested inside ModifiedDiffs for the directories
     assert len(modified) == 2
 
-    dir_names = [mod.record.name for mod in modified]
+    by_name = diffs_by_name(modified)
 
-    assert 'dir1' in dir_names
-    dir1_index = dir_names.index('dir1')
-    dir1_diff = modified[dir1_index]
+    assert 'dir1' in by_name
+    dir1_diff = by_name['dir1']
 
     assert len(dir1_diff.children) == 1
     child1 = dir1_diff.children[0]
     assert isinstance(child1, MovedToDiff)
     assert child1.record.name == 'file_a.txt'
 
-    assert 'dir2' in dir_names
-    dir2_index = dir_names.index('dir2')
-    dir2_diff = modified[dir2_index]
+    assert 'dir2' in by_name
+    dir2_diff = by_name['dir2']
 
     assert len(dir2_diff.children) == 1
     child2 = dir2_diff.children[0]
@@ -520,26 +520,26 @@ def test_diff_workdir_type_change(temp_repo: Repository) -> None:
     file_path.unlink()
     file_path.mkdir()
 
-    shutil.rmtree(dir_path)
+    rmtree(dir_path)
 
     dir_path = temp_repo.working_dir / 'a_dir'
     dir_path.write_text('I am a file now')
 
-    diff_result = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diff_result = diff_head_to_workdir(temp_repo)
     added, modified, moved_to, moved_from, removed = \
         split_diffs_by_type(diff_result)
 
     assert len(modified) == 2
 
-    names = [m.record.name for m in modified]
-    assert 'a_file' in names
-    assert 'a_dir' in names
+    by_name = diffs_by_name(modified)
+    assert 'a_file' in by_name
+    assert 'a_dir' in by_name
 
-    file_diff = next(d for d in modified if d.record.name == 'a_file')
+    file_diff = by_name['a_file']
     assert isinstance(file_diff, ModifiedDiff)
     assert len(file_diff.children) == 0
 
-    dir_diff = next(d for d in modified if d.record.name == 'a_dir')
+    dir_diff = by_name['a_dir']
     assert isinstance(dir_diff, ModifiedDiff)
 
     assert len(dir_diff.children) == 0
@@ -551,7 +551,7 @@ def test_diff_workdir_added_directory(temp_repo: Repository) -> None:
     new_dir.mkdir()
     (new_dir / 'nested_file.txt').write_text('content')
 
-    diffs = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diffs = diff_head_to_workdir(temp_repo)
 
     assert len(diffs) == 1
     assert isinstance(diffs[0], AddedDiff)
@@ -569,11 +569,12 @@ def test_diff_workdir_moved_file_detection(temp_repo: Repository) -> None:
 
     file_path.rename(temp_repo.working_dir / 'new_name.txt')
 
-    diffs = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diffs = diff_head_to_workdir(temp_repo)
 
     assert len(diffs) == 2
 
-    new_file_diff = next(d for d in diffs if d.record.name == 'new_name.txt')
+    by_name = diffs_by_name(diffs)
+    new_file_diff = by_name['new_name.txt']
 
     assert isinstance(new_file_diff, MovedFromDiff)
     assert new_file_diff.moved_from is not None
@@ -586,7 +587,7 @@ def test_diff_removed_directory(temp_repo: Repository) -> None:
 
     commit1 = temp_repo.commit_working_dir('Tester', 'Initial commit')
 
-    shutil.rmtree(dir_path)
+    rmtree(dir_path)
 
     commit2 = temp_repo.commit_working_dir('Tester', 'Deleted directory')
 
@@ -615,7 +616,7 @@ def test_directory_with_files_removed(temp_repo: Repository) -> None:
     (dir_path / 'file1.txt').unlink()
     (dir_path / 'file2.txt').unlink()
 
-    shutil.rmtree(dir_path)
+    rmtree(dir_path)
 
     diff_result = temp_repo.diff(commit1, temp_repo.working_dir)
 
@@ -673,26 +674,51 @@ def test_directory_move_detection(temp_repo: Repository) -> None:
 
     temp_repo.commit_working_dir('Tester', 'Initial commit')
 
-    shutil.move(src_dir, temp_repo.working_dir / 'dst')
+    move(src_dir, temp_repo.working_dir / 'dst')
 
-    diffs = temp_repo.diff(temp_repo.head_commit(), temp_repo.working_dir)
+    diffs = diff_head_to_workdir(temp_repo)
     added, modified, moved_to, moved_from, removed = split_diffs_by_type(diffs)
 
     assert len(added) == 0
     assert len(removed) == 0
 
-    names = [d.record.name for d in diffs]
-    assert 'src' in names
-    assert 'dst' in names
+    by_name = diffs_by_name(diffs)
+    assert 'src' in by_name
+    assert 'dst' in by_name
 
-    src_diff = next(d for d in diffs if d.record.name == 'src')
-    dst_diff = next(d for d in diffs if d.record.name == 'dst')
+    src_diff = by_name['src']
+    dst_diff = by_name['dst']
 
     assert isinstance(src_diff, MovedToDiff)
     assert isinstance(dst_diff, MovedFromDiff)
     
     assert src_diff.moved_to == dst_diff
 
+def test_directory_move_does_not_pair_its_contents(temp_repo: Repository) -> None:
+    src_dir = temp_repo.working_dir / 'src'
+    src_dir.mkdir()
+    (src_dir / 'data.txt').write_text('important data')
+
+    temp_repo.commit_working_dir('Tester', 'Initial commit')
+
+    move(src_dir, temp_repo.working_dir / 'dst')
+    (temp_repo.working_dir / 'copy.txt').write_text('important data')
+
+    diffs = diff_head_to_workdir(temp_repo)
+    added, modified, moved_to, moved_from, removed = split_diffs_by_type(diffs)
+
+    # The copy matches a file inside the moved directory, but that directory moved as a whole
+    assert len(added) == 1
+    assert added[0].record.name == 'copy.txt'
+
+    assert len(moved_to) == 1
+    assert moved_to[0].record.name == 'src'
+    assert len(moved_from) == 1
+    assert moved_from[0].record.name == 'dst'
+
+    assert len(removed) == 0
+    assert len(modified) == 0
+
 def test_directory_content_modification_propagates_hash(temp_repo: Repository) -> None:
     docs_dir = temp_repo.working_dir / 'docs'
     docs_dir.mkdir()
@@ -725,4 +751,82 @@ def test_fs_vs_fs_different_content(temp_repo: Repository) -> None:
 
     assert len(diffs) == 1
     assert isinstance(diffs[0], ModifiedDiff)
-    assert diffs[0].record.name == 'file.txt'
\ No newline at end of file
+    assert diffs[0].record.name == 'file.txt'
+
+
+def test_fs_tree_reuses_hash_for_unchanged_stat(temp_repo: Repository) -> None:
+    file_path = temp_repo.working_dir / 'file.txt'
+    file_path.write_text('content')
+    st = os.stat(file_path)
+
+    cached_hash = 'a' * len(hash_file(file_path))
+    key = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino, st.st_dev)
+    stat_cache = StatCache()
+    stat_cache.put(str(file_path), key, cached_hash)
+
+    tree, _ = build_fsTree(temp_repo.working_dir, {}, temp_repo.repo_dir.name, stat_cache)
+
+    assert tree.records['file.txt'].hash == cached_hash
+
+
+def test_fs_tree_rehashes_file_with_changed_stat(temp_repo: Repository) -> None:
+    file_path = temp_repo.working_dir / 'file.txt'
+    file_path.write_text('content')
+
+    stat_cache = StatCache()
+    stat_cache.put(str(file_path), (0, 0, 0, 0, 0), 'a' * len(hash_file(file_path)))
+
+    tree, _ = build_fsTree(temp_repo.working_dir, {}, temp_repo.repo_dir.name, stat_cache)
+
+    assert tree.records['file.txt'].hash == hash_file(file_path)
+    # The file was just written, so its new hash is too recent to be trusted for reuse,
+    # and the outdated entry must not be kept either
+    assert str(file_path) not in stat_cache
+
+
+def test_fs_tree_drops_cached_hashes_of_deleted_files(temp_repo: Repository) -> None:
+    kept = temp_repo.working_dir / 'kept.txt'
+    kept.write_text('kept')
+    deleted = temp_repo.working_dir / 'deleted.txt'
+    outside = temp_repo.working_dir.parent / 'outside.txt'
+
+    st = os.stat(kept)
+    kept_key = (st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino, st.st_dev)
+    stat_cache = StatCache()
+    stat_cache.put(str(kept), kept_key, hash_file(kept))
+    stat_cache.put(str(deleted), (0, 0, 0, 0, 0), 'a' * len(hash_file(kept)))
+    stat_cache.put(str(outside), (0, 0, 0, 0, 0), 'a' * len(hash_file(kept)))
+
+    build_fsTree(temp_repo.working_dir, {}, temp_repo.repo_dir.name, stat_cache)
+
+    # Only paths under the scanned directory are known to be gone
+    assert str(deleted) not in stat_cache
+    assert str(kept) in stat_cache
+    assert str(outside) in stat_cache
+
+
+def test_fs_tree_drops_cached_hashes_of_deleted_directories(temp_repo: Repository) -> None:
+    sub_dir = temp_repo.working_dir / 'sub'
+    nested = sub_dir / 'nested' / 'file.txt'
+    file_hash = 'a' * len(hash_file(temp_repo.head_file()))
+
+    stat_cache = StatCache()
+    stat_cache.put(str(nested), (0, 0, 0, 0, 0), file_hash)
+    stat_cache.put(str(sub_dir / 'file.txt'), (0, 0, 0, 0, 0), file_hash)
+
+    build_fsTree(temp_repo.working_dir, {}, temp_repo.repo_dir.name, stat_cache)
+
+    assert len(stat_cache) == 0
+
+
+def test_stat_cache_evicts_least_recently_used() -> None:
+    stat_cache = StatCache(max_size=2)
+    stat_cache.put('/d/a', (0, 0, 0, 0, 0), 'a')
+    stat_cache.put('/d/b', (0, 0, 0, 0, 0), 'b')
+    stat_cache.get('/d/a')
+
+    stat_cache.put('/e/c', (0, 0, 0, 0, 0), 'c')
+
+    assert '/d/a' in stat_cache
+    assert '/d/b' not in stat_cache
+    assert '/e/c' in stat_cache
@@ -44,7 +44,7 @@ def test_save_load_tree(temp_repo_dir: Path) -> None:
     tree = Tree(records)
     tree_hash = hash_object(tree)
 
-    save_tree(temp_repo_dir, tree)
+    assert save_tree(temp_repo_dir, tree) == tree_hash
     loaded_tree = load_tree(temp_repo_dir, tree_hash)
 
     assert loaded_tree.records.keys() == records.keys()
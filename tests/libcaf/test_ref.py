@@ -1,7 +1,7 @@
 from pathlib import Path
 
 from libcaf.constants import HASH_LENGTH
-from libcaf.ref import HashRef, RefError, SymRef, read_ref, write_ref
+from libcaf.ref import HashRef, RefError, SymRef, is_hash, read_ref, write_ref
 from pytest import fixture, raises
 
 
@@ -20,6 +20,18 @@ def test_branch_name_multiple_slashes() -> None:
     assert symref.branch_name() == 'feature-branch'
 
 
+def test_is_hash() -> None:
+    assert is_hash('a' * HASH_LENGTH)
+    assert is_hash('0123456789abcdef' * (HASH_LENGTH // 16) + 'a' * (HASH_LENGTH % 16))
+
+    assert not is_hash('')
+    assert not is_hash('a' * (HASH_LENGTH - 1))
+    assert not is_hash('a' * (HASH_LENGTH + 1))
+    assert not is_hash('A' * HASH_LENGTH)
+    assert not is_hash('g' * HASH_LENGTH)
+    assert not is_hash('a' * HASH_LENGTH + '\n')
+
+
 @fixture
 def ref_file(tmp_path: Path) -> Path:
     return tmp_path / 'ref'
@@ -103,6 +115,16 @@ def test_write_symbolic_ref(ref_file: Path) -> None:
         assert f.read() == 'ref: refs/heads/main'
 
 
+def test_write_exclusive_ref_does_not_overwrite(ref_file: Path) -> None:
+    write_ref(ref_file, SymRef('refs/heads/main'))
+
+    with raises(FileExistsError):
+        write_ref(ref_file, HashRef('a' * HASH_LENGTH), exclusive=True)
+
+    with ref_file.open() as f:
+        assert f.read() == 'ref: refs/heads/main'
+
+
 def test_write_invalid_ref_type_raises_error(ref_file: Path) -> None:
     with raises(RefError):
         write_ref(ref_file, 123)
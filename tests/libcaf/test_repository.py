@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from shutil import rmtree
 
@@ -142,6 +143,47 @@ def test_resolve_ref_invalid_string_raises_error(temp_repo: Repository) -> None:
         temp_repo.resolve_ref('abc123')
 
 
+def test_resolve_ref_sees_refs_written_externally(temp_repo: Repository) -> None:
+    # Backdate the refs directories so the first lookup's scan is trusted and reused
+    for ref_dir in (temp_repo.refs_dir(), temp_repo.heads_dir(), temp_repo.tags_dir()):
+        os.utime(ref_dir, (0, 0))
+
+    with raises(RefError):
+        temp_repo.resolve_ref('external')
+
+    # Simulate another process writing a ref behind this instance's back
+    (temp_repo.refs_dir() / 'external').write_text('a' * HASH_LENGTH)
+
+    assert temp_repo.resolve_ref('external') == HashRef('a' * HASH_LENGTH)
+
+
+def test_resolve_ref_sees_updated_ref(temp_repo: Repository) -> None:
+    ref = branch_ref(DEFAULT_BRANCH)
+    temp_repo.update_ref(ref, HashRef('a' * HASH_LENGTH))
+    assert temp_repo.resolve_ref(ref) == HashRef('a' * HASH_LENGTH)
+
+    temp_repo.update_ref(ref, HashRef('b' * HASH_LENGTH))
+
+    assert temp_repo.resolve_ref(ref) == HashRef('b' * HASH_LENGTH)
+    assert temp_repo.head_commit() == HashRef('b' * HASH_LENGTH)
+
+
+def test_head_ref_does_not_keep_outdated_ref_cache_entry(temp_repo: Repository) -> None:
+    head_file = str(temp_repo.head_file())
+    temp_repo._ref_cache[head_file] = ((0, 0, 0, 0, 0), SymRef('stale'))
+
+    assert temp_repo.head_ref() == branch_ref(DEFAULT_BRANCH)
+    # HEAD was just written, so the fresh value is too recent to cache and the outdated one is dropped
+    assert head_file not in temp_repo._ref_cache
+
+
+def test_resolve_ref_loop_raises_error(temp_repo: Repository) -> None:
+    (temp_repo.refs_dir() / 'loop').write_text('ref: loop')
+
+    with raises(RefError):
+        temp_repo.resolve_ref(SymRef('loop'))
+
+
 def test_resolve_ref_invalid_type_raises_error(temp_repo: Repository) -> None:
     with raises(RefError):
         temp_repo.resolve_ref(123)
@@ -179,6 +221,22 @@ def test_add_branch_already_exists_raises_error(temp_repo: Repository) -> None:
         temp_repo.add_branch(DEFAULT_BRANCH)
 
 
+def test_save_dir_with_sibling_subdirs(temp_repo: Repository) -> None:
+    test_dir = temp_repo.working_dir / 'test_dir'
+    for name in ['a', 'b', 'c']:
+        sub_dir = test_dir / name / 'nested'
+        sub_dir.mkdir(parents=True)
+        (sub_dir / f'{name}.txt').write_text(f'Content of {name}')
+    (test_dir / 'top.txt').write_text('Top level content')
+
+    tree_ref = temp_repo.save_dir(test_dir)
+    tree = load_tree(temp_repo.objects_dir(), tree_ref)
+
+    assert set(tree.records) == {'a', 'b', 'c', 'top.txt'}
+    for name in ['a', 'b', 'c']:
+        assert tree.records[name].hash == temp_repo.save_dir(test_dir / name)
+
+
 def test_save_dir_invalid_path_raises_error(temp_repo: Repository) -> None:
     with raises(NotADirectoryError):
         temp_repo.save_dir(None)
@@ -360,3 +418,24 @@ def test_head_commit_with_symbolic_ref_returns_hash_ref(temp_repo: Repository) -
     temp_repo.update_ref('heads/main', commit_ref)
 
     assert temp_repo.head_commit() == commit_ref
+
+
+def test_diff_reuses_cached_trees(temp_repo: Repository) -> None:
+    temp_file = temp_repo.working_dir / 'test_file.txt'
+    temp_file.write_text('Initial commit content')
+    commit_ref1 = temp_repo.commit_working_dir('Author', 'First commit')
+
+    temp_file.write_text('Second commit content')
+    commit_ref2 = temp_repo.commit_working_dir('Author', 'Second commit')
+
+    first_diff = temp_repo.diff(commit_ref1, commit_ref2)
+
+    # Objects are immutable, so once loaded they are served from the cache
+    # even if the file on disk is later damaged
+    objects_dir = temp_repo.objects_dir()
+    tree_hash = load_commit(objects_dir, commit_ref1).tree_hash
+    (objects_dir / tree_hash[:2] / tree_hash).write_text('corrupted tree data')
+
+    second_diff = temp_repo.diff(commit_ref1, commit_ref2)
+
+    assert [d.record.name for d in second_diff] == [d.record.name for d in first_diff]
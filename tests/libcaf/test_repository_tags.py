@@ -1,4 +1,6 @@
 import pytest
+from libcaf import Tree
+from libcaf.plumbing import save_tree
 from libcaf.repository import Repository, HashRef
 from libcaf.constants import HASH_LENGTH
 from libcaf.exceptions import TagNotFound, TagExistsError, UnknownHashError, RepositoryError
@@ -6,19 +8,21 @@ from datetime import datetime
 
 def test_init_creates_tags_dir(temp_repo: Repository):
     """Tests that the 'tags' directory is created by repo.init()."""
-    assert temp_repo.tags() == []
+    assert not temp_repo.has_tags()
 
 def test_create_tag_success(temp_repo: Repository, commit_hash: HashRef):
     """Tests the happy path for creating a tag."""
     temp_repo.create_tag('v1.0', commit_hash, 'Some author', 'Some message')
 
-    tags_dict = {tag.name: tag for tag in temp_repo.tags()}
-    assert len(tags_dict) == 1
-    assert tags_dict['v1.0'].name == 'v1.0'
-    assert tags_dict['v1.0'].commit_hash == commit_hash
-    assert tags_dict['v1.0'].author == 'Some author'
-    assert tags_dict['v1.0'].message == 'Some message'
-    assert isinstance(tags_dict['v1.0'].timestamp, int)
+    tags = temp_repo.tags()
+    assert len(tags) == 1
+
+    tag = tags[0]
+    assert tag.name == 'v1.0'
+    assert tag.commit_hash == commit_hash
+    assert tag.author == 'Some author'
+    assert tag.message == 'Some message'
+    assert isinstance(tag.timestamp, int)
 
 
 def test_create_tag_already_exists(temp_repo: Repository, commit_hash: HashRef):
@@ -28,47 +32,46 @@ def test_create_tag_already_exists(temp_repo: Repository, commit_hash: HashRef):
     with pytest.raises(TagExistsError):
         temp_repo.create_tag('v1.0', commit_hash, 'Some author', 'Some message')
 
-def test_create_tag_empty_name(temp_repo: Repository, commit_hash: HashRef):
-    """Tests that creating a tag with an empty name fails."""
-    with pytest.raises(ValueError, match="Tag name is required"):
-        temp_repo.create_tag('', commit_hash, 'Some author', 'Some message')
+# Well-formed but never stored; argument validation rejects these calls before the hash is looked up
+UNSTORED_HASH = '0' * HASH_LENGTH
 
-def test_create_tag_invalid_hash(temp_repo: Repository):
-    """Tests creating a tag with an invalid hash format."""
-    with pytest.raises(ValueError, match="Invalid commit hash"):
-        temp_repo.create_tag('v1.0', 'not-a-hash', 'Some author', 'Some message')
-
-def test_create_tag_no_author(temp_repo: Repository, commit_hash: HashRef):
-    """Tests creating a tag with no author."""
-    with pytest.raises(ValueError, match="Tag author is required"):
-        temp_repo.create_tag('v1.0', commit_hash, None, 'Some message')
-
-def test_create_tag_no_message(temp_repo: Repository, commit_hash: HashRef):
-    """Tests creating a tag with no message."""
-    with pytest.raises(ValueError, match="Tag message is required"):
-        temp_repo.create_tag('v1.0', commit_hash, 'Some author', None)
+@pytest.mark.parametrize(('tag_name', 'tag_hash', 'author', 'message', 'error'), [
+    ('', UNSTORED_HASH, 'Some author', 'Some message', 'Tag name is required'),
+    ('v1.0', 'not-a-hash', 'Some author', 'Some message', 'Invalid commit hash'),
+    ('v1.0', UNSTORED_HASH, None, 'Some message', 'Tag author is required'),
+    ('v1.0', UNSTORED_HASH, 'Some author', None, 'Tag message is required'),
+])
+def test_create_tag_invalid_arguments(temp_repo: Repository, tag_name: str, tag_hash: str,
+                                      author: str | None, message: str | None, error: str):
+    """Tests that create_tag rejects each missing or malformed argument."""
+    with pytest.raises(ValueError, match=error):
+        temp_repo.create_tag(tag_name, tag_hash, author, message)
 
 
 def test_create_tag_nonexistent_object(temp_repo: Repository):
     """Tests creating a tag pointing to an object that doesn't exist."""
     non_existent_hash = 'a' * HASH_LENGTH
+    objects_before = set(temp_repo.objects_dir().iterdir())
+
     with pytest.raises(UnknownHashError, match="Unknown commit hash"):
         temp_repo.create_tag('v1.0', non_existent_hash, 'Some author', 'Some message')
 
+    # The failed lookup must not leave an empty shard directory behind
+    assert set(temp_repo.objects_dir().iterdir()) == objects_before
+
 def test_create_tag_points_to_tree(temp_repo: Repository):
     """Tests that create_tag fails if the hash points to a Tree, not a Commit."""
-    tree_hash = temp_repo.save_dir(temp_repo.working_dir)
+    tree_hash = save_tree(temp_repo.objects_dir(), Tree({}))
     
     with pytest.raises(RepositoryError):
         temp_repo.create_tag('v1.0', tree_hash, 'Some author', 'Some message')
 
 def test_list_tags(temp_repo: Repository, commit_hash: HashRef):
     """Tests listing multiple tags."""
-    temp_repo.create_tag('v1.0', commit_hash, 'Some author', 'Some message')
-    temp_repo.create_tag('v1.1-beta', commit_hash, 'Some author', 'Some message')
+    temp_repo.create_tags([('v1.0', commit_hash, 'Some author', 'Some message'),
+                           ('v1.1-beta', commit_hash, 'Some author', 'Some message')])
     
-    tags = temp_repo.tags()
-    tags_dict = {tag.name: tag for tag in tags}
+    tags_dict = {tag.name: tag for tag in temp_repo.tags_iter()}
 
     assert len(tags_dict) == 2
     assert set(tags_dict.keys()) == {'v1.0', 'v1.1-beta'}
@@ -86,10 +89,45 @@ def test_list_tags(temp_repo: Repository, commit_hash: HashRef):
     assert isinstance(tags_dict['v1.1-beta'].timestamp, int)
 
 
+def test_create_tags_duplicate_name_writes_nothing(temp_repo: Repository, commit_hash: HashRef):
+    """Tests that a batch repeating a tag name fails before any tag is written."""
+    with pytest.raises(TagExistsError):
+        temp_repo.create_tags([('v1.0', commit_hash, 'Some author', 'Some message'),
+                               ('v1.1', commit_hash, 'Some author', 'Some message'),
+                               ('v1.0', commit_hash, 'Some author', 'Some message')])
+
+    assert temp_repo.tags() == []
+
+
+def test_create_tags_from_generator(temp_repo: Repository, commit_hash: HashRef):
+    """Tests that create_tags writes every tag when given a one-shot iterable."""
+    temp_repo.create_tags((name, commit_hash, 'Some author', 'Some message') for name in ('v1.0', 'v1.1'))
+
+    assert {tag.name for tag in temp_repo.tags()} == {'v1.0', 'v1.1'}
+
+
+def test_create_tags_write_failure_removes_written_tags(temp_repo: Repository, commit_hash: HashRef):
+    """Tests that a batch failing while writing removes the tags it already wrote."""
+    # The missing parent directory passes validation but makes the second write fail
+    with pytest.raises(FileNotFoundError):
+        temp_repo.create_tags([('v1.0', commit_hash, 'Some author', 'Some message'),
+                               ('missing/v1.1', commit_hash, 'Some author', 'Some message')])
+
+    assert not temp_repo.has_tags()
+
+
 def test_list_tags_empty(temp_repo: Repository):
     """Tests listing tags when none exist."""
     assert temp_repo.tags() == []
 
+def test_has_tags(temp_repo: Repository, commit_hash: HashRef):
+    """Tests that has_tags reflects tags being created and deleted."""
+    temp_repo.create_tag('v1.0', commit_hash, 'Some author', 'Some message')
+    assert temp_repo.has_tags()
+
+    temp_repo.delete_tag('v1.0')
+    assert not temp_repo.has_tags()
+
 def test_delete_tag_success(temp_repo: Repository, commit_hash: HashRef):
     """Tests the happy path for deleting a tag."""
     temp_repo.create_tag('v1.0', commit_hash, 'Some author', 'Some message')
@@ -98,8 +136,19 @@ def test_delete_tag_success(temp_repo: Repository, commit_hash: HashRef):
     
     temp_repo.delete_tag('v1.0')
 
-    tags_dict = {tag.name: tag for tag in temp_repo.tags()}
-    assert 'v1.0' not in tags_dict
+    assert all(tag.name != 'v1.0' for tag in temp_repo.tags_iter())
+
+def test_delete_tags_with_missing_name_deletes_nothing(temp_repo: Repository, commit_hash: HashRef):
+    """Tests that a batch naming a missing tag fails before any tag is deleted."""
+    temp_repo.create_tags([('v1.0', commit_hash, 'Some author', 'Some message'),
+                           ('v1.1', commit_hash, 'Some author', 'Some message')])
+
+    with pytest.raises(TagNotFound):
+        temp_repo.delete_tags(['v1.0', 'v2.0'])
+    assert {tag.name for tag in temp_repo.tags()} == {'v1.0', 'v1.1'}
+
+    temp_repo.delete_tags(['v1.0', 'v1.1'])
+    assert not temp_repo.has_tags()
 
 def test_delete_tag_nonexistent(temp_repo: Repository):
     """Tests that deleting a non-existent tag raises the correct error."""